@@ -2,7 +2,7 @@ import os
 import csv
 import time
 import sqlite3
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Tuple
 
 
 # Default paths
@@ -211,54 +211,74 @@ def init_db(db_path: str = DEFAULT_DB_PATH) -> None:
         conn.close()
 
 
-def upsert_overview(domain: str, updates: Dict[str, Any], db_path: str = DEFAULT_DB_PATH) -> None:
+def _merge_overview_updates(current: Dict[str, str], domain: str, updates: Dict[str, Any]) -> None:
+    # Apply updates with merge rules
+    current[CSV_HEADER[0]] = domain
+    for k, v in (updates or {}).items():
+        if k not in CSV_HEADER or v is None:
+            continue
+        if k == "Overall pipelines Error Details":
+            current[k] = _merge_overall_error(current.get(k) or "", str(v))
+        elif k == "Overall pipelines Explanation":
+            current[k] = _merge_friendly_explanation(current.get(k) or "", str(v))
+        else:
+            current[k] = str(v)
+
+    # Ensure all columns exist
+    for h in CSV_HEADER:
+        current.setdefault(h, "")
+
+
+def _upsert_sql() -> str:
+    placeholders = ", ".join(["?"] * len(CSV_HEADER))
+    colnames = ", ".join(['"{}"'.format(h) for h in CSV_HEADER])
+    update_set = ", ".join(['"{0}" = excluded."{0}"'.format(h) for h in CSV_HEADER[1:]])
+    pk = CSV_HEADER[0]
+    return (
+        f'INSERT INTO pipelines_overview ({colnames}) VALUES ({placeholders}) '
+        f'ON CONFLICT("{pk}") DO UPDATE SET {update_set}'
+    )
+
+
+# Keep IN (...) lists under SQLite's default host-parameter limit
+_SELECT_CHUNK = 500
+
+
+def upsert_overview_many(items: List[Tuple[str, Dict[str, Any]]], db_path: str = DEFAULT_DB_PATH) -> bool:
+    """Apply several (domain, updates) pairs in one write transaction, in order.
+
+    Existing rows are read with one SELECT per chunk of domains, merged in memory
+    (repeated domains fold in sequence) and written back with a single executemany.
+    Returns False if the transaction was rolled back (nothing from the batch is
+    written), so callers can retry the items on their own.
+    """
+    if not items:
+        return True
+    domains = list(dict.fromkeys(d for d, _ in items))
+    select_cols = ", ".join(['"{}"'.format(h) for h in CSV_HEADER])
+    pk = CSV_HEADER[0]
     # Retry on database lock
     for attempt in range(5):
         conn = _connect(db_path)
         try:
             conn.execute("BEGIN IMMEDIATE")  # reserve write lock
-            # Fetch existing row (quoted identifiers without backslashes)
-            select_cols = ", ".join(['"{}"'.format(h) for h in CSV_HEADER])
-            pk = CSV_HEADER[0]
-            cur = conn.execute(
-                f'SELECT {select_cols} FROM pipelines_overview WHERE "{pk}" = ?',
-                (domain,),
-            )
-            row = cur.fetchone()
-            if row is None:
-                current = _default_row(domain)
-            else:
-                current = {CSV_HEADER[i]: (row[i] if row[i] is not None else "") for i in range(len(CSV_HEADER))}
-
-            # Apply updates with merge rules
-            current[CSV_HEADER[0]] = domain
-            for k, v in (updates or {}).items():
-                if k not in CSV_HEADER or v is None:
-                    continue
-                if k == "Overall pipelines Error Details":
-                    current[k] = _merge_overall_error(current.get(k) or "", str(v))
-                elif k == "Overall pipelines Explanation":
-                    current[k] = _merge_friendly_explanation(current.get(k) or "", str(v))
-                else:
-                    current[k] = str(v)
-
-            # Ensure all columns exist
-            for h in CSV_HEADER:
-                current.setdefault(h, "")
-
-            # Build UPSERT
-            placeholders = ", ".join(["?"] * len(CSV_HEADER))
-            colnames = ", ".join(['"{}"'.format(h) for h in CSV_HEADER])
-            update_set = ", ".join(['"{0}" = excluded."{0}"'.format(h) for h in CSV_HEADER[1:]])
-            values = [current[h] for h in CSV_HEADER]
-            pk = CSV_HEADER[0]
-            sql = (
-                f'INSERT INTO pipelines_overview ({colnames}) VALUES ({placeholders}) '
-                f'ON CONFLICT("{pk}") DO UPDATE SET {update_set}'
-            )
-            conn.execute(sql, values)
+            rows: Dict[str, Dict[str, str]] = {}
+            for i in range(0, len(domains), _SELECT_CHUNK):
+                chunk = domains[i:i + _SELECT_CHUNK]
+                cur = conn.execute(
+                    f'SELECT {select_cols} FROM pipelines_overview WHERE "{pk}" IN ({", ".join(["?"] * len(chunk))})',
+                    chunk,
+                )
+                for row in cur:
+                    rows[row[0]] = {CSV_HEADER[j]: (row[j] if row[j] is not None else "") for j in range(len(CSV_HEADER))}
+            for domain, updates in items:
+                current = rows.get(domain)
+                if current is None:
+                    current = rows[domain] = _default_row(domain)
+                _merge_overview_updates(current, domain, updates)
+            conn.executemany(_upsert_sql(), [[rows[d][h] for h in CSV_HEADER] for d in domains])
             conn.execute("COMMIT")
-            return
+            return True
         except sqlite3.OperationalError as e:
             try:
                 conn.execute("ROLLBACK")
@@ -269,52 +289,59 @@ def upsert_overview(domain: str, updates: Dict[str, Any], db_path: str = DEFAULT
                 time.sleep(0.05 * (2 ** attempt))
                 continue
             else:
-                return
+                return False
         except Exception:
             try:
                 conn.execute("ROLLBACK")
             except Exception:
                 pass
-            return
+            return False
         finally:
             conn.close()
+    return False
+
+
+def upsert_overview(domain: str, updates: Dict[str, Any], db_path: str = DEFAULT_DB_PATH) -> bool:
+    return upsert_overview_many([(domain, updates)], db_path)
+
+
+# Rows pulled from SQLite per fetchmany() during export
+_EXPORT_FETCH = 10_000
 
 
 def export_csv(csv_path: str = DEFAULT_CSV_PATH, db_path: str = DEFAULT_DB_PATH) -> None:
     conn = _connect(db_path)
     tmp = csv_path + ".tmp"
     try:
-        colnames = ", ".join(['"{}"'.format(h) for h in CSV_HEADER])
+        # NULLs come back as '' so rows can be written positionally as-is
+        colnames = ", ".join(["IFNULL(\"{}\", '')".format(h) for h in CSV_HEADER])
         pk = CSV_HEADER[0]
         cur = conn.execute(
             f'SELECT {colnames} FROM pipelines_overview ORDER BY "{pk}" ASC'
         )
-        rows = cur.fetchall()
-        with open(tmp, "w", encoding="utf-8", newline="") as f:
-            w = csv.DictWriter(f, fieldnames=CSV_HEADER)
-            w.writeheader()
-            for r in rows:
-                out = {CSV_HEADER[i]: (r[i] if r[i] is not None else "") for i in range(len(CSV_HEADER))}
-                w.writerow(out)
+        with open(tmp, "w", encoding="utf-8", newline="", buffering=1 << 20) as f:
+            w = csv.writer(f)
+            w.writerow(CSV_HEADER)
+            while True:
+                rows = cur.fetchmany(_EXPORT_FETCH)
+                if not rows:
+                    break
+                w.writerows(rows)
         try:
             os.replace(tmp, csv_path)
-        except Exception:
+        except OSError:
             try:
-                if os.path.exists(csv_path):
-                    os.remove(csv_path)
-            except Exception:
+                os.unlink(csv_path)
+            except OSError:
                 pass
             try:
                 os.rename(tmp, csv_path)
-            except Exception:
+            except OSError:
                 pass
     except Exception:
         try:
-            if os.path.exists(tmp):
-                os.remove(tmp)
-        except Exception:
+            os.unlink(tmp)
+        except OSError:
             pass
     finally:
         conn.close()
-
-
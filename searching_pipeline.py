@@ -811,6 +811,12 @@ def _cli():
     parser.add_argument("--concurrency", type=int, default=1)
     args = parser.parse_args()
 
+    try:
+        from sitemap_filters import configure_cli_logging
+        configure_cli_logging()
+    except ImportError:
+        pass
+
     out_path = args.output
     script_dir = os.path.dirname(__file__)
     project_root = os.path.abspath(os.path.join(script_dir, ".."))
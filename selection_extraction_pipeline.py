@@ -110,7 +110,7 @@ def _to_str(val, default: str) -> str:
         return default
 
 # Import filter functions
-from sitemap_filters import filter_by_words, filter_by_date, filter_sitemaps_by_year
+from sitemap_filters import filter_by_words, filter_by_date, filter_sitemaps_by_year, configure_cli_logging
 
 # Import LLM function
 import selector_scraper as ss
@@ -3111,6 +3111,8 @@ def main():
     parser.add_argument("--max-depth", type=int, default=2, dest="max_depth", help="Max sitemap recursion depth (default 2)")
     args = parser.parse_args()
 
+    configure_cli_logging()
+
     print("=" * 80)
     print("🧪 SITEMAP FILTERING TEST - Recursive Expansion")
     print("=" * 80)
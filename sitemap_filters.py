@@ -17,10 +17,28 @@ Usage:
 """
 
 import re
+import sys
+import time
+import logging
 from datetime import datetime, timedelta, timezone
+from functools import lru_cache
 from typing import Optional, Tuple, List, Dict
 
 
+# Library logger: handlers and levels are left to the application (the CLI entry
+# points call configure_cli_logging); per-URL detail is only formatted at DEBUG.
+logger = logging.getLogger(__name__)
+
+
+def configure_cli_logging() -> None:
+    """Print this module's log lines on stdout, like the pipelines' own prints.
+
+    Meant for command-line entry points; the root setup is a no-op if logging is
+    already configured. Per-URL filter detail still needs level DEBUG.
+    """
+    logging.basicConfig(format="%(message)s", stream=sys.stdout)
+    logger.setLevel(logging.INFO)
+
 # ============================================================================
 # WORD-BASED FILTERING
 # ============================================================================
@@ -486,6 +504,46 @@ def get_filter_stats(results: Dict[str, any]) -> str:
 # MAIN (for testing)
 # ============================================================================
 
+# Comprehensive regex: catches years 1950-2039 anywhere in URL
+# Range 1950-2039 avoids false matches with port numbers (8080) or random IDs
+YEAR_PATTERN = re.compile(r'(19[5-9]\d|20[0-3]\d)')
+
+
+# (monotonic timestamp, year) of the last wall-clock read; refreshed every 60s
+_YEAR_CACHE: Tuple[float, int] = (0.0, 0)
+
+
+def _current_year() -> int:
+    global _YEAR_CACHE
+    now = time.monotonic()
+    t, y = _YEAR_CACHE
+    if y and now - t < 60.0:
+        return y
+    y = datetime.now().year
+    _YEAR_CACHE = (now, y)
+    return y
+
+
+@lru_cache(maxsize=65536)
+def _classify_url(url: str, year: int) -> Optional[str]:
+    """
+    Year verdict for a single sitemap URL (pure, memoized on (url, year)).
+    
+    Returns:
+        None to keep the URL, or a rejection reason string
+    """
+    # Find ALL year occurrences in URL
+    years_found = [int(y) for y in YEAR_PATTERN.findall(url)]
+    
+    # No year found → KEEP (conservative); only current year → KEEP
+    if all(y == year for y in years_found):
+        return None
+    
+    # Has old year(s) → REJECT
+    old_years = [str(y) for y in years_found if y != year]
+    return f"old year(s): {', '.join(old_years)}"
+
+
 def filter_sitemaps_by_year(sitemap_urls: List[str]) -> List[str]:
     """
     Filter out sitemap URLs containing ANY year except the current year.
@@ -512,41 +570,30 @@ def filter_sitemaps_by_year(sitemap_urls: List[str]) -> List[str]:
         - news.xml (no year)
         - sitemap_latest.xml (no year)
     """
-    current_year = datetime.now().year
-    
-    # Comprehensive regex: catches years 1950-2039 anywhere in URL
-    # Range 1950-2039 avoids false matches with port numbers (8080) or random IDs
-    year_pattern = r'(19[5-9]\d|20[0-3]\d)'
+    current_year = _current_year()
     
     kept = []
     rejected = []
     
     for url in sitemap_urls:
-        # Find ALL year occurrences in URL
-        years_found = [int(y) for y in re.findall(year_pattern, url)]
-        
-        if not years_found:
-            # No year found → KEEP (conservative)
-            kept.append(url)
-        elif all(y == current_year for y in years_found):
-            # Only current year → KEEP
+        reason = _classify_url(url, current_year)
+        if reason is None:
             kept.append(url)
         else:
-            # Has old year(s) → REJECT
-            old_years = [str(y) for y in years_found if y != current_year]
-            rejected.append((url, f"old year(s): {', '.join(old_years)}"))
+            rejected.append((url, reason))
     
     # Logging
     if rejected:
-        print(f"[year-filter] 🚀 Rejected {len(rejected)} sitemap(s) with old years:")
-        for url, reason in rejected[:5]:
-            # Shorten URL for display
-            short_url = url.split('/')[-1] if '/' in url else url
-            print(f"[year-filter]   ❌ {short_url} ({reason})")
-        if len(rejected) > 5:
-            print(f"[year-filter]   ... and {len(rejected) - 5} more")
-    
-    print(f"[year-filter] URLs: {len(sitemap_urls)} → {len(kept)} (rejected {len(rejected)} by year)")
+        logger.info("[year-filter] Rejected %d sitemap(s) with old years", len(rejected))
+        if logger.isEnabledFor(logging.DEBUG):
+            for url, reason in rejected[:5]:
+                # Shorten URL for display
+                short_url = url.rpartition('/')[2] or url
+                logger.debug("[year-filter]   %s (%s)", short_url, reason)
+            if len(rejected) > 5:
+                logger.debug("[year-filter]   ... and %d more", len(rejected) - 5)
+    
+    logger.info("[year-filter] URLs: %d -> %d (rejected %d by year)", len(sitemap_urls), len(kept), len(rejected))
     
     return kept
 
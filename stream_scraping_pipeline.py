@@ -1,17 +1,28 @@
 import os
 import sys
+import atexit
 import json
 import time
+import functools
+import itertools
 import threading
 import concurrent.futures as cf
 from typing import Dict, Any, List, Optional, Iterator, Tuple
 from urllib.parse import urlparse
 from queue import Queue, Empty
 from datetime import datetime, timezone
-import csv
-from overview_store import init_db as ov_init_db, upsert_overview as ov_upsert, export_csv as ov_export_csv
+from collections import deque
+from overview_store import init_db as ov_init_db, upsert_overview as ov_upsert, upsert_overview_many as ov_upsert_many, export_csv as ov_export_csv
 import httpx
 import xml.etree.ElementTree as ET
+try:
+    import orjson  # optional, faster JSON encoding for JSONL output
+except Exception:
+    orjson = None
+try:
+    import ijson  # optional, incremental parsing of large targets JSON files
+except Exception:
+    ijson = None
 
 # Force unbuffered output for real-time logs (MUST be before any other stdout modifications)
 os.environ['PYTHONUNBUFFERED'] = '1'
@@ -25,18 +36,89 @@ import news_scraper_via_selectors as ns
 from sitemap_discovery import expand_sitemap_entries_recent  # type: ignore
 
 
-def _append_jsonl(record: Dict[str, Any], out_path: str) -> None:
-    os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
-    with open(out_path, 'a', encoding='utf-8') as f:
-        json.dump(record, f, ensure_ascii=False)
-        f.write('\n')
-        f.flush()
+# fsync after every Writer batch (and every _append_jsonl_bytes call) is opt-in
+# (JSONL_FSYNC=1). By default records rely on kernel writeback; Writer.close()
+# still fsyncs each output once.
+JSONL_FSYNC = str(os.getenv('JSONL_FSYNC', '0')).strip().lower() in ('1', 'true', 'yes', 'on')
+
+# One O_APPEND descriptor per path, opened on first use and closed at exit.
+# O_APPEND makes each os.write land atomically at EOF, so threads need no lock.
+_append_fd_cache: Dict[str, int] = {}
+_append_fd_lock = threading.Lock()
+
+
+def _append_fd(out_path: str) -> int:
+    fd = _append_fd_cache.get(out_path)
+    if fd is None:
+        with _append_fd_lock:
+            fd = _append_fd_cache.get(out_path)
+            if fd is None:
+                os.makedirs(os.path.dirname(out_path) or '.', exist_ok=True)
+                flags = os.O_WRONLY | os.O_APPEND | os.O_CREAT | getattr(os, 'O_BINARY', 0)
+                fd = _append_fd_cache[out_path] = os.open(out_path, flags, 0o644)
+    return fd
+
+
+@atexit.register
+def _close_append_fds() -> None:
+    with _append_fd_lock:
+        for fd in _append_fd_cache.values():
+            try:
+                os.close(fd)
+            except Exception:
+                pass
+        _append_fd_cache.clear()
+
+
+def _write_all(fd: int, data: bytes) -> None:
+    view = memoryview(data)
+    while view:
+        view = view[os.write(fd, view):]
+
+
+try:
+    _IOV_MAX = int(os.sysconf('SC_IOV_MAX'))
+except Exception:
+    _IOV_MAX = 1024
+if _IOV_MAX <= 0:
+    _IOV_MAX = 1024
+
+
+def _writev_all(fd: int, chunks: List[bytes]) -> None:
+    """Write a batch of byte strings with one writev() per IOV_MAX chunks (no join copy)."""
+    if not hasattr(os, 'writev'):
+        _write_all(fd, b''.join(chunks))
+        return
+    for i in range(0, len(chunks), _IOV_MAX):
+        part = chunks[i:i + _IOV_MAX]
+        n = os.writev(fd, part)
+        total = sum(map(len, part))
+        if n < total:
+            # Short write: finish the remainder with plain writes
+            _write_all(fd, b''.join(part)[n:])
+
+
+def _append_jsonl_bytes(data: bytes, out_path: str) -> None:
+    fd = _append_fd(out_path)
+    _write_all(fd, data)
+    if JSONL_FSYNC:
         try:
-            os.fsync(f.fileno())
+            os.fsync(fd)
         except Exception:
             pass
 
 
+def _jsonl_line(record: Dict[str, Any]) -> bytes:
+    """Serialize one record as a UTF-8 JSONL line (orjson when available)."""
+    if orjson is not None:
+        try:
+            # Newline appended inside orjson's output buffer -> no second bytes copy
+            return orjson.dumps(record, option=orjson.OPT_APPEND_NEWLINE)
+        except Exception:
+            pass
+    return (json.dumps(record, ensure_ascii=False) + '\n').encode('utf-8')
+
+
 def _iter_jsonl(path: str) -> Iterator[Dict[str, Any]]:
     """Yield JSON objects from a JSONL file as they arrive, blocking for new lines."""
     with open(path, 'r', encoding='utf-8') as f:
@@ -73,6 +155,31 @@ def _read_jsonl_once(path: str) -> List[Dict[str, Any]]:
     return rows
 
 
+# Targets files above this size are streamed with ijson (when installed) instead of
+# being parsed in one go
+_TARGETS_STREAM_BYTES = 64 << 20
+
+
+def _iter_targets_json(path: str) -> Iterator[Any]:
+    """Yield the elements of a targets JSON array.
+
+    Typical files are parsed in one shot with orjson (json as fallback); very large
+    ones are parsed incrementally with ijson to keep memory flat.
+    """
+    with open(path, 'rb') as f:
+        if ijson is not None and os.fstat(f.fileno()).st_size > _TARGETS_STREAM_BYTES:
+            yield from ijson.items(f, 'item', use_float=True)
+            return
+        data = f.read()
+    arr = orjson.loads(data) if orjson is not None else json.loads(data)
+    if isinstance(arr, list):
+        yield from arr
+
+
+# End-of-input marker the site reader puts on the site queue when it is done
+_SENTINEL = object()
+
+
 # ========================
 # Proxy + Fallback Helpers
 # ========================
@@ -82,37 +189,69 @@ proxy_hosts_lock = threading.Lock()
 SCRAPE_TIMEOUT: float = 15.0  # default; set from CLI
 
 
-def _http_probe(url: str, timeout: float = 5.0) -> Optional[Dict[str, Any]]:
-    headers = {
-        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
-        'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+_PROBE_HEADERS = {
+    'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36',
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+}
+
+
+def _probe_result(url: str, r: Any) -> Dict[str, Any]:
+    try:
+        status = int(getattr(r, 'status_code', 0) or 0)
+    except Exception:
+        status = 0
+    try:
+        raw = r.content[:1024] if getattr(r, 'content', None) is not None else b''
+    except Exception:
+        raw = b''
+    try:
+        body_snippet = raw.decode('utf-8', errors='replace').replace('\n', ' ')
+    except Exception:
+        body_snippet = ''
+    headers_out = {}
+    try:
+        headers_out = dict(getattr(r, 'headers', {}) or {})
+    except Exception:
+        headers_out = {}
+    return {
+        'url': url,
+        'status_code': status,
+        'headers': headers_out,
+        'body_snippet': (body_snippet[:512] if isinstance(body_snippet, str) else '')
     }
+
+
+# One keep-alive client shared by every worker thread (httpx.Client is thread-safe):
+# repeat probes to a host reuse the pooled connection instead of a fresh TCP/TLS setup
+_probe_client: Optional[httpx.Client] = None
+_probe_client_lock = threading.Lock()
+
+
+def _get_probe_client() -> httpx.Client:
+    global _probe_client
+    client = _probe_client
+    if client is None:
+        with _probe_client_lock:
+            client = _probe_client
+            if client is None:
+                limits = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+                client = _probe_client = httpx.Client(headers=_PROBE_HEADERS, follow_redirects=True, limits=limits)
+    return client
+
+
+@atexit.register
+def _close_probe_client() -> None:
     try:
-        with httpx.Client(timeout=timeout, headers=headers, follow_redirects=True) as client:
-            r = client.get(url)
-            try:
-                status = int(getattr(r, 'status_code', 0) or 0)
-            except Exception:
-                status = 0
-            try:
-                raw = r.content[:1024] if getattr(r, 'content', None) is not None else b''
-            except Exception:
-                raw = b''
-            try:
-                body_snippet = raw.decode('utf-8', errors='replace').replace('\n', ' ')
-            except Exception:
-                body_snippet = ''
-            headers_out = {}
-            try:
-                headers_out = dict(getattr(r, 'headers', {}) or {})
-            except Exception:
-                headers_out = {}
-            return {
-                'url': url,
-                'status_code': status,
-                'headers': headers_out,
-                'body_snippet': (body_snippet[:512] if isinstance(body_snippet, str) else '')
-            }
+        if _probe_client is not None:
+            _probe_client.close()
+    except Exception:
+        pass
+
+
+def _http_probe(url: str, timeout: float = 5.0) -> Optional[Dict[str, Any]]:
+    try:
+        r = _get_probe_client().get(url, timeout=timeout)
+        return _probe_result(url, r)
     except Exception:
         return None
 
@@ -139,6 +278,11 @@ def _classify_probe(probe: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]
         return None
 
 
+# Shared worker threads for browser sitemap retries: reused across calls instead of
+# spawning (and tearing down) a thread per retry. Threads start lazily on demand.
+_BROWSER_POOL = cf.ThreadPoolExecutor(max_workers=32, thread_name_prefix='sitemap-browser')
+
+
 def _browser_fetch_sitemap_text(url: str, timeout: float = 15.0) -> str:
     """
     Fetch sitemap text using Playwright browser.
@@ -174,27 +318,32 @@ def _browser_fetch_sitemap_text(url: str, timeout: float = 15.0) -> str:
         except Exception:
             return ''
     
-    # Run Playwright in a thread executor to avoid event loop conflicts
+    # Run Playwright on the shared browser pool to avoid event loop conflicts
     # This is necessary when called from async contexts (like FastAPI with uvloop)
     try:
-        with cf.ThreadPoolExecutor(max_workers=1) as executor:
-            future = executor.submit(_run_playwright)
-            return future.result(timeout=timeout + 5.0)  # Add buffer for thread overhead
+        future = _BROWSER_POOL.submit(_run_playwright)
     except Exception:
-        # Fallback: try direct execution if thread executor fails
+        # Fallback: try direct execution if the pool is unavailable (e.g. at shutdown)
         return _run_playwright()
+    try:
+        return future.result(timeout=timeout + 5.0)  # Add buffer for thread overhead
+    except Exception:
+        # Drop the job if it is still queued behind busy workers so it doesn't launch a browser nobody waits for
+        future.cancel()
+        return ''
 
 
-def _parse_sitemap_entries_from_text(xml_text: str) -> List[Dict[str, Any]]:
+def _parse_sitemap_entries_from_text(xml_text: str, max_urls: int = 0) -> List[Dict[str, Any]]:
     if not xml_text:
         return []
     try:
         root = ET.fromstring(xml_text)
     except Exception:
         return []
-    tag = (root.tag or '').lower()
+    # Case-insensitive suffix check on the last 6 chars only (namespaced tags are long)
+    tag = root.tag or ''
     out: List[Dict[str, Any]] = []
-    if tag.endswith('urlset'):
+    if tag[-6:].lower() == 'urlset':
         for u in root.findall('.//{*}url'):
             try:
                 loc = u.findtext('{*}loc') or u.findtext('loc')
@@ -202,6 +351,8 @@ def _parse_sitemap_entries_from_text(xml_text: str) -> List[Dict[str, Any]]:
                 loc = None
             if loc:
                 out.append({'url': str(loc).strip()})
+                if max_urls > 0 and len(out) >= max_urls:
+                    break
     return out
 
 
@@ -215,40 +366,47 @@ def _promote_host(host: str) -> None:
     except Exception:
         pass
 
+# Shared read-only fallback for missing nested fields (never mutated)
+_EMPTY_DICT: Dict[str, Any] = {}
+
+
 def _normalize_targets(stream_obj: Dict[str, Any]) -> List[Dict[str, Any]]:
     """Convert one stream result object into zero or more scraping targets."""
     targets: List[Dict[str, Any]] = []
-    result = stream_obj.get('result') or {}
+    result = stream_obj.get('result') or _EMPTY_DICT
     site_url = result.get('url') or result.get('domain') or ''
     if not site_url:
         return targets
+    append = targets.append
 
     # Sitemap targets from llmDetection.selectors
-    llm = result.get('llmDetection') or {}
-    sel_list = llm.get('selectors') or []
-    for item in sel_list:
-        leaf_url = item.get('url')
-        detected = item.get('detectedSelectors') or {}
-        fields = detected.get('fields') or {}
-        item_tag = detected.get('item') or 'url'
-        if leaf_url and fields:
-            targets.append({
-                'type': 'sitemap',
-                'site': site_url,
-                'sitemapUrl': leaf_url,
-                'itemTag': item_tag,
-                'fields': fields,
-                'detectedBy': detected.get('detectionMethod', 'llm')
-            })
+    llm = result.get('llmDetection')
+    sel_list = llm.get('selectors') if llm else None
+    if sel_list:
+        for item in sel_list:
+            detected = item.get('detectedSelectors')
+            if not detected:
+                continue
+            leaf_url = item.get('url')
+            fields = detected.get('fields')
+            if leaf_url and fields:
+                append({
+                    'type': 'sitemap',
+                    'site': site_url,
+                    'sitemapUrl': leaf_url,
+                    'itemTag': detected.get('item') or 'url',
+                    'fields': fields,
+                    'detectedBy': detected.get('detectionMethod', 'llm')
+                })
 
     # CSS targets from cssFallback.selectors.sections
-    cssf = result.get('cssFallback') or {}
-    if cssf.get('triggered') and cssf.get('success'):
-        csssel = cssf.get('selectors') or {}
+    cssf = result.get('cssFallback')
+    if cssf and cssf.get('triggered') and cssf.get('success'):
+        csssel = cssf.get('selectors') or _EMPTY_DICT
         page_url = csssel.get('pageUrl') or site_url
-        sections = csssel.get('sections') or []
+        sections = csssel.get('sections')
         if page_url and sections:
-            targets.append({
+            append({
                 'type': 'css',
                 'site': site_url,
                 'pageUrl': page_url,
@@ -259,149 +417,8 @@ def _normalize_targets(stream_obj: Dict[str, Any]) -> List[Dict[str, Any]]:
     return targets
 
 
-# ========================
-# CSV upsert helper (shared contract)
-# ========================
-_CSV_PATH = os.path.join(os.path.dirname(__file__) or '.', 'pipelines_overview.csv')
-_CSV_HEADER = [
-    'Domain (sources)',
-    'Selector Discovery Attempted',
-    'Selector Discovery Not Attempted Reason',
-    'Selector Discovery Attempt Error',
-    'Selector Discovery Attempt Error Response',
-    'Sitemap Processing Status',
-    'Sitemap Processing Error Details',
-    'leaf Sitemap URLs Discovered',
-    'CSS Fallback Status',
-    'CSS Fallback error Details',
-    'Which Path Used for Final Extraction',
-    'Total Time (sec) in scraping',
-    'Raw Articles scraped',
-    'Zero Raw Articles Reason',
-    'Cleaning Status',
-    'Cleaned Articles (Final)',
-    'Duplicates Removed',
-    'Missing Dates Removed',
-    'Out of Range/Old Date Removed',
-    'Overall pipelines Status',
-    'Overall pipelines Error Details',
-    'Overall pipelines Explanation',
-    'Leaf Sitemap URLs',
-]
-
-
-def _read_csv_map(path: str) -> Dict[str, Dict[str, str]]:
-    rows: Dict[str, Dict[str, str]] = {}
-    if not os.path.exists(path):
-        return rows
-    try:
-        with open(path, 'r', encoding='utf-8', newline='') as f:
-            r = csv.DictReader(f)
-            for row in r:
-                d = (row.get(_CSV_HEADER[0]) or '').strip()
-                if d:
-                    rows[d] = {k: (row.get(k) or '') for k in _CSV_HEADER}
-    except Exception:
-        pass
-    return rows
-
-
-def _default_row(domain: str) -> Dict[str, str]:
-    return {
-        'Domain (sources)': domain,
-        'Selector Discovery Attempted': 'No',
-        'Selector Discovery Not Attempted Reason': '',
-        'Selector Discovery Attempt Error': '',
-        'Sitemap Processing Status': 'Not Attempted',
-        'Sitemap Processing Error Details': '',
-        'leaf Sitemap URLs Discovered': '0',
-        'CSS Fallback Status': 'Not Attempted',
-        'CSS Fallback error Details': '',
-        'Which Path Used for Final Extraction': 'Neither',
-        'Total Time (sec) in scraping': '0',
-        'Raw Articles scraped': '0',
-        'Cleaning Status': 'Not Attempted',
-        'Cleaned Articles (Final)': '0',
-        'Duplicates Removed': '0',
-        'Missing Dates Removed': '0',
-        'Out of Range/Old Date Removed': '0',
-        'Overall pipelines Status': 'Pending',
-        'Leaf Sitemap URLs': '',
-    }
-
-
-def _write_csv_map(path: str, rows: Dict[str, Dict[str, str]]) -> None:
-    tmp = path + '.tmp'
-    try:
-        with open(tmp, 'w', encoding='utf-8', newline='') as f:
-            w = csv.DictWriter(f, fieldnames=_CSV_HEADER)
-            w.writeheader()
-            for domain in sorted(rows.keys()):
-                row = rows[domain]
-                for h in _CSV_HEADER:
-                    row.setdefault(h, '')
-                w.writerow(row)
-        try:
-            os.replace(tmp, path)
-        except Exception:
-            try:
-                if os.path.exists(path):
-                    os.remove(path)
-            except Exception:
-                pass
-            try:
-                os.rename(tmp, path)
-            except Exception:
-                pass
-    except Exception:
-        try:
-            if os.path.exists(tmp):
-                os.remove(tmp)
-        except Exception:
-            pass
-
-
-def _upsert_csv_row(domain: str, updates: Dict[str, str]) -> None:
-    for _ in range(3):
-        try:
-            rows = _read_csv_map(_CSV_PATH)
-            row = rows.get(domain) or _default_row(domain)
-            row[_CSV_HEADER[0]] = domain
-            for k, v in (updates or {}).items():
-                if k in _CSV_HEADER and v is not None:
-                    if k == 'Overall pipelines Error Details':
-                        # Merge rather than overwrite
-                        prev = row.get(k) or ''
-                        try:
-                            parts = [s.strip() for s in (prev or '').split(' | ') if s.strip()]
-                            if str(v).strip() and str(v).strip() not in parts:
-                                parts.append(str(v).strip())
-                            row[k] = ' | '.join(parts)[:300]
-                        except Exception:
-                            row[k] = str(v)[:300]
-                    elif k == 'Overall pipelines Explanation':
-                        prev = row.get(k) or ''
-                        try:
-                            parts = [s.strip() for s in (prev or '').split(' | ') if s.strip()]
-                            sent = str(v).strip()
-                            if sent and sent not in parts:
-                                parts.append(sent)
-                            row[k] = ' | '.join(parts)[:300]
-                        except Exception:
-                            row[k] = str(v)[:300]
-                    else:
-                        row[k] = str(v)
-            rows[domain] = row
-            _write_csv_map(_CSV_PATH, rows)
-            return
-        except PermissionError:
-            import time as _t
-            _t.sleep(0.2)
-        except Exception:
-            return
-
-
-def _scrape_sitemap_target(t: Dict[str, Any]) -> List[Dict[str, Any]]:
+def _scrape_sitemap_target(t: Dict[str, Any], max_urls: int = 0) -> List[Dict[str, Any]]:
+    # max_urls > 0 stops expansion/parsing once that many entries are collected
     leaf = t.get('sitemapUrl')
     fields = t.get('fields') or None
     host = _domain_of(leaf or '')
@@ -411,31 +428,24 @@ def _scrape_sitemap_target(t: Dict[str, Any]) -> List[Dict[str, Any]]:
         try:
             print(f"[proxy] Proxy-first sitemap fetch: {leaf}")
             xml_text = _browser_fetch_sitemap_text(leaf, timeout=SCRAPE_TIMEOUT)
-            ents = _parse_sitemap_entries_from_text(xml_text)
+            ents = _parse_sitemap_entries_from_text(xml_text, max_urls=max_urls)
             if ents:
                 return ents
         except Exception:
             pass
         # Optional: try normal as a backup
         try:
-            ents = expand_sitemap_entries_recent(leaf, recent_hours=0, field_selectors=fields)
+            ents = expand_sitemap_entries_recent(leaf, recent_hours=0, max_urls=max_urls, field_selectors=fields)
         except Exception:
             ents = []
-        out: List[Dict[str, Any]] = []
-        for e in ents:
-            if e.get('url'):
-                out.append(e)
-        return out
+        return [e for e in ents if e.get('url')]
 
     # Normal-first for non-promoted hosts
     try:
-        ents = expand_sitemap_entries_recent(leaf, recent_hours=0, timeout=SCRAPE_TIMEOUT, field_selectors=fields)
+        ents = expand_sitemap_entries_recent(leaf, recent_hours=0, timeout=SCRAPE_TIMEOUT, max_urls=max_urls, field_selectors=fields)
     except Exception:
         ents = []
-    out: List[Dict[str, Any]] = []
-    for e in ents:
-        if e.get('url'):
-            out.append(e)
+    out: List[Dict[str, Any]] = [e for e in ents if e.get('url')]
     if out:
         return out
 
@@ -450,7 +460,7 @@ def _scrape_sitemap_target(t: Dict[str, Any]) -> List[Dict[str, Any]]:
         try:
             print(f"[proxy] Fallback sitemap via browser+proxy: {leaf} ({classified.get('subtype')})")
             xml_text = _browser_fetch_sitemap_text(leaf, timeout=SCRAPE_TIMEOUT)
-            ents2 = _parse_sitemap_entries_from_text(xml_text)
+            ents2 = _parse_sitemap_entries_from_text(xml_text, max_urls=max_urls)
             if ents2:
                 try:
                     print(f"[proxy] Fallback SUCCESS (sitemap): {leaf} -> entries={len(ents2)}")
@@ -538,6 +548,39 @@ def _scrape_css_target(t: Dict[str, Any], headful: bool = False, slowmo_ms: int
     return arts
 
 
+def _run_sm(t: Dict[str, Any], sitemap_sem: threading.Semaphore, http_sem: threading.Semaphore, dom_sem: threading.Semaphore, max_urls: int = 0) -> List[Dict[str, Any]]:
+    # Acquire order: sitemap -> http -> domain
+    with sitemap_sem, http_sem, dom_sem:
+        return _scrape_sitemap_target(t, max_urls=max_urls)
+
+
+def _run_css(t: Dict[str, Any], css_sem: threading.Semaphore, http_sem: threading.Semaphore, dom_sem: threading.Semaphore, headful: bool, slowmo_ms: int, max_items: int) -> List[Dict[str, Any]]:
+    # Acquire order: css -> http -> domain
+    with css_sem, http_sem, dom_sem:
+        return _scrape_css_target(t, headful=headful, slowmo_ms=slowmo_ms, max_items=max_items)
+
+
+_UTC = timezone.utc
+
+
+def _utc_iso() -> str:
+    """Current UTC time as an ISO-8601 string with seconds resolution."""
+    return datetime.fromtimestamp(time.time(), _UTC).isoformat(timespec='seconds')
+
+
+def _target_jobs(targets: List[Dict[str, Any]], mode: str, sitemap_sem: threading.Semaphore, http_sem: threading.Semaphore, css_sem: threading.Semaphore, get_domain_sem: Any, sitemap_cap: int, headful: bool, slowmo_ms: int, max_items: int) -> Iterator[Tuple[str, Any, Tuple[Any, ...]]]:
+    # Yields (source type, fn, fn args) lazily so jobs are only built as slots free up
+    for t in targets:
+        do_sm, do_css = _SHOULD_RUN.get((mode, t.get('type')), _RUN_NONE)
+        if do_sm:
+            dom_sem = get_domain_sem(_domain_of(t.get('sitemapUrl') or ''))
+            yield 'sitemap', _run_sm, (t, sitemap_sem, http_sem, dom_sem, sitemap_cap)
+        if do_css:
+            dom_sem = get_domain_sem(_domain_of(t.get('pageUrl') or ''))
+            yield 'css', _run_css, (t, css_sem, http_sem, dom_sem, headful, slowmo_ms, max_items)
+
+
+@functools.lru_cache(maxsize=4096)
 def _domain_of(url: str) -> str:
     try:
         return urlparse(url).netloc.lower()
@@ -545,96 +588,199 @@ def _domain_of(url: str) -> str:
         return ''
 
 
+# (mode, target type) -> (run sitemap scrape, run css scrape). A target only ever runs
+# its own type; 'auto' and 'both' run every target, a single-type mode only its own.
+_SHOULD_RUN: Dict[Tuple[str, str], Tuple[bool, bool]] = {
+    ('auto', 'sitemap'): (True, False),
+    ('auto', 'css'): (False, True),
+    ('both', 'sitemap'): (True, False),
+    ('both', 'css'): (False, True),
+    ('sitemap', 'sitemap'): (True, False),
+    ('sitemap', 'css'): (False, False),
+    ('css', 'sitemap'): (False, False),
+    ('css', 'css'): (False, True),
+}
+_RUN_NONE = (False, False)
+
+# Per-domain concurrency stripes (power of two)
+_DOMAIN_STRIPES = 128
+
+# Max overview updates folded into one SQLite write transaction
+_OVERVIEW_BATCH = 128
+
+
+def _drain_overview_upserts(q: Queue) -> None:
+    """Apply queued (domain, updates) pairs in batches until _SENTINEL is received."""
+    while True:
+        item = q.get()
+        done = item is _SENTINEL
+        batch: List[Tuple[str, Dict[str, Any]]] = [] if done else [item]
+        # Take whatever else is already waiting, without blocking
+        while not done and len(batch) < _OVERVIEW_BATCH:
+            try:
+                item = q.get_nowait()
+            except Empty:
+                break
+            if item is _SENTINEL:
+                done = True
+            else:
+                batch.append(item)
+        if batch:
+            try:
+                ok = ov_upsert_many(batch)
+            except Exception:
+                ok = False
+            if not ok:
+                # The whole transaction was rolled back: retry site by site so one bad
+                # row (or a long lock) costs that site only, not the batch
+                for domain, updates in batch:
+                    err = ''
+                    try:
+                        ok = ov_upsert(domain, updates)
+                    except Exception as e:
+                        ok, err = False, f": {e}"
+                    if not ok:
+                        print(f"[stream] Overview upsert failed for {domain}{err}")
+        if done:
+            return
+
+
 class Writer:
-    def __init__(self, out_path: str, queue_size: int = 1000, batch_size: int = 50, flush_interval_sec: float = 0.5) -> None:
+    def __init__(self, out_path: str, queue_size: int = 1000, batch_size: int = 50, flush_interval_sec: float = 0.5, durable: Optional[bool] = None, append: bool = False) -> None:
         self.out_path = out_path
-        self.q: Queue = Queue(maxsize=max(10, queue_size))
+        self._append = bool(append)
+        # durable=True fsyncs after every batch; otherwise only close() fsyncs.
+        # Left unset it follows JSONL_FSYNC.
+        self._durable = JSONL_FSYNC if durable is None else bool(durable)
+        # Single producer->consumer deque; one lock shared by both conditions
+        self._dq: deque = deque()
+        self._max_queued = max(10, queue_size)
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
         self._stop = threading.Event()
         self._thr = threading.Thread(target=self._run, daemon=True)
-        self._f = None  # type: ignore
+        self._fd: Optional[int] = None
         self._batch_size = max(1, int(batch_size))
         self._flush_interval_sec = max(0.05, float(flush_interval_sec))
+        # Shorter window used after the queue has been empty for a while (low load)
+        self._idle_flush_interval_sec = max(0.05, self._flush_interval_sec / 5.0)
+        self._idle = False
+        self._first_pending = 0.0  # arrival time of the oldest unflushed record
+        self._last_write = time.perf_counter()
 
     def start(self) -> None:
-        # Truncate existing file and open once for batched appends
+        # Truncate existing file (unless appending) and open one raw fd for batched appends
         try:
             os.makedirs(os.path.dirname(self.out_path) or '.', exist_ok=True)
-            self._f = open(self.out_path, 'w', encoding='utf-8')
+            flags = os.O_WRONLY | os.O_CREAT | os.O_APPEND | getattr(os, 'O_BINARY', 0)
+            if not self._append:
+                flags |= os.O_TRUNC
+            self._fd = os.open(self.out_path, flags, 0o644)
         except Exception:
-            self._f = None
+            self._fd = None
         self._thr.start()
 
     def _run(self) -> None:
-        buffer: List[Dict[str, Any]] = []
-        last_flush = time.perf_counter()
-        while not self._stop.is_set():
+        dq = self._dq
+        max_drain = self._batch_size * 4
+        while True:
+            with self._lock:
+                # Sleep until a full batch is queued, the oldest record's flush window
+                # elapses, or close()
+                if len(dq) < self._batch_size and not self._stop.is_set():
+                    if dq:
+                        interval = self._idle_flush_interval_sec if self._idle else self._flush_interval_sec
+                        wait = interval - (time.perf_counter() - self._first_pending)
+                    else:
+                        # Nothing queued: sleep until submit() hands over a first record
+                        wait = None
+                    if wait is None or wait > 0:
+                        self._not_empty.wait(timeout=wait)
+                now = time.perf_counter()
+                stopping = self._stop.is_set()
+                if not dq:
+                    if stopping:
+                        break
+                    continue
+                interval = self._idle_flush_interval_sec if self._idle else self._flush_interval_sec
+                if len(dq) < self._batch_size and not stopping and (now - self._first_pending) < interval:
+                    continue
+                # Under load drain up to 4x batch_size in one go -> one larger write
+                buffer = [dq.popleft() for _ in range(min(len(dq), max_drain))]
+                self._first_pending = now  # any backlog left starts a fresh window
+                self._last_write = now
+                self._idle = False
+                self._not_full.notify_all()
+
+            # I/O outside the lock: the whole batch goes to the kernel in one writev()
+            if self._fd is None:
+                # Fallback to appending the batch if file couldn't be opened
+                self._append_fallback(buffer)
+                continue
             try:
-                rec = self.q.get(timeout=0.2)
-                buffer.append(rec)
-                self.q.task_done()
-            except Empty:
-                pass
-
-            now = time.perf_counter()
-            should_flush = (len(buffer) >= self._batch_size) or ((buffer) and (now - last_flush >= self._flush_interval_sec))
-            if not should_flush:
+                _writev_all(self._fd, buffer)
+            except Exception:
+                # Fallback to safe path for this batch
+                self._append_fallback(buffer)
                 continue
+            if self._durable:
+                try:
+                    os.fsync(self._fd)
+                except Exception:
+                    pass
 
-            try:
-                if self._f is None:
-                    # Fallback to per-record append if file couldn't be opened
-                    for r in buffer:
-                        _append_jsonl(r, self.out_path)
-                else:
-                    for r in buffer:
-                        try:
-                            self._f.write(json.dumps(r, ensure_ascii=False))
-                            self._f.write('\n')
-                        except Exception:
-                            # Fallback to safe path for this record
-                            _append_jsonl(r, self.out_path)
-                    try:
-                        self._f.flush()
-                        # Optional: fsync per batch for durability
-                        try:
-                            os.fsync(self._f.fileno())
-                        except Exception:
-                            pass
-                    except Exception:
-                        pass
-            finally:
-                buffer.clear()
-                last_flush = now
+    def _append_fallback(self, lines: List[bytes]) -> None:
+        try:
+            _append_jsonl_bytes(b''.join(lines), self.out_path)
+        except Exception:
+            pass
 
     def submit(self, record: Dict[str, Any]) -> None:
-        self.q.put(record)
+        # Serialize on the producer thread; the writer thread only joins and writes bytes
+        line = _jsonl_line(record)
+        with self._lock:
+            while len(self._dq) >= self._max_queued and self._thr.is_alive():
+                self._not_full.wait(timeout=0.2)
+            self._dq.append(line)
+            n = len(self._dq)
+            wake = n == self._batch_size
+            if n == 1:
+                now = time.perf_counter()
+                self._first_pending = now
+                # Nothing written for >2s (low load): flush this record on the short window
+                if now - self._last_write > 2.0:
+                    self._idle = True
+                # The writer sleeps without a timeout while empty; start its flush window
+                wake = True
+            # Otherwise wake the writer once per full batch rather than per record
+            if wake:
+                self._not_empty.notify()
 
     def close(self) -> None:
-        # First, wait for all queued records to be written
-        self.q.join()
-        # Then signal the thread to exit and wait briefly
+        # Signal the thread; it drains everything still queued before exiting
         self._stop.set()
+        with self._lock:
+            self._not_empty.notify()
         try:
-            self._thr.join(timeout=5)
-        except Exception:
-            pass
-        # Flush any remaining buffered writes and close file
-        try:
-            if getattr(self, '_f', None) is not None:
-                try:
-                    self._f.flush()
-                except Exception:
-                    pass
-                try:
-                    os.fsync(self._f.fileno())
-                except Exception:
-                    pass
-                try:
-                    self._f.close()
-                except Exception:
-                    pass
+            self._thr.join()
         except Exception:
             pass
+        # Everything is already written; make it durable once and close
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            try:
+                os.fsync(fd)
+            except Exception:
+                pass
+            try:
+                os.close(fd)
+            except Exception:
+                pass
+
+
+# sites_by_approach key indexed by (has_sitemap << 1) | has_css
+APPROACH_KEYS = ('none', 'cssOnly', 'sitemapOnly', 'both')
 
 
 class StatsCollector:
@@ -651,6 +797,11 @@ class StatsCollector:
         self.articles_by_source: Dict[str, int] = {"sitemap": 0, "css": 0}
         self.sites_by_approach: Dict[str, int] = {"sitemapOnly": 0, "cssOnly": 0, "both": 0, "none": 0}
         self._last_snapshot_sites_written: int = 0
+        self._last_snapshot_state: Optional[Tuple[Any, ...]] = None
+        # Serializes summary file writes (tmp write + rename) across site workers
+        self._summary_write_lock = threading.Lock()
+        # Batched per-site log; start_global() already truncates when not appending
+        self._sites_writer = Writer(sites_log_path, batch_size=20, flush_interval_sec=1.0, append=True)
 
     def start_global(self) -> None:
         # Prepare files
@@ -667,94 +818,119 @@ class StatsCollector:
                     pass
             except Exception:
                 pass
+        self._sites_writer.start()
         self._global_start = time.perf_counter()
 
     def end_global(self) -> None:
         self._global_end = time.perf_counter()
+        # Drain pending site records before the summary is written
+        self._sites_writer.close()
 
     def record_site(self, *, site: str, started_at_iso: str, ended_at_iso: str, duration_sec: float, items_by_source: Dict[str, int], approaches_used: List[str]) -> None:
+        sm_n = int(items_by_source.get('sitemap', 0))
+        css_n = int(items_by_source.get('css', 0))
+        site_total = sm_n + css_n
+        # Approach categorization: bit 1 = sitemap, bit 0 = css -> APPROACH_KEYS index
+        flags = 0
+        for a in approaches_used:
+            if a == 'sitemap':
+                flags |= 2
+            elif a == 'css':
+                flags |= 1
         with self._lock:
             self.total_sites_processed += 1
-            site_total = int(items_by_source.get('sitemap', 0)) + int(items_by_source.get('css', 0))
             self.total_articles += site_total
-            self.articles_by_source['sitemap'] += int(items_by_source.get('sitemap', 0))
-            self.articles_by_source['css'] += int(items_by_source.get('css', 0))
-            # Approach categorization
-            used = set(approaches_used)
-            if 'sitemap' in used and 'css' in used:
-                self.sites_by_approach['both'] += 1
-            elif 'sitemap' in used:
-                self.sites_by_approach['sitemapOnly'] += 1
-            elif 'css' in used:
-                self.sites_by_approach['cssOnly'] += 1
-            else:
-                self.sites_by_approach['none'] += 1
-            # Also write per-site log record
-            rec = {
-                'site': site,
-                'startedAt': started_at_iso,
-                'endedAt': ended_at_iso,
-                'durationSec': round(float(duration_sec), 3),
-                'itemsTotal': site_total,
-                'itemsBySource': {
-                    'sitemap': int(items_by_source.get('sitemap', 0)),
-                    'css': int(items_by_source.get('css', 0))
-                },
-                'approachesUsed': list(used)
-            }
-        # Append outside lock using existing helper
+            self.articles_by_source['sitemap'] += sm_n
+            self.articles_by_source['css'] += css_n
+            self.sites_by_approach[APPROACH_KEYS[flags]] += 1
+        # Also write per-site log record
+        rec = {
+            'site': site,
+            'startedAt': started_at_iso,
+            'endedAt': ended_at_iso,
+            'durationSec': round(float(duration_sec), 3),
+            'itemsTotal': site_total,
+            'itemsBySource': {
+                'sitemap': sm_n,
+                'css': css_n
+            },
+            'approachesUsed': list(dict.fromkeys(approaches_used))
+        }
+        # Queued outside the lock; the sites writer batches the appends
         try:
-            _append_jsonl(rec, self.sites_log_path)
+            self._sites_writer.submit(rec)
         except Exception:
             pass
 
+    def _summary(self, total_duration: float) -> Dict[str, Any]:
+        return {
+            'totalDurationSec': round(float(total_duration or 0.0), 3),
+            'totalSitesProcessed': int(self.total_sites_processed),
+            'totalArticles': int(self.total_articles),
+            'articlesBySource': {
+                'sitemap': int(self.articles_by_source.get('sitemap', 0)),
+                'css': int(self.articles_by_source.get('css', 0))
+            },
+            'sitesByApproach': {
+                'sitemapOnly': int(self.sites_by_approach.get('sitemapOnly', 0)),
+                'cssOnly': int(self.sites_by_approach.get('cssOnly', 0)),
+                'both': int(self.sites_by_approach.get('both', 0)),
+                'none': int(self.sites_by_approach.get('none', 0))
+            }
+        }
+
+    def _snapshot_state(self) -> Tuple[Any, ...]:
+        # Aggregates only (caller holds _lock): duration always moves, so it doesn't count as a change
+        return (
+            self.total_sites_processed,
+            self.total_articles,
+            tuple(self.articles_by_source.values()),
+            tuple(self.sites_by_approach.values()),
+        )
+
+    def _write_summary_file(self, summary: Dict[str, Any]) -> None:
+        # Temp file + atomic rename so dashboards never read a half-written summary.
+        # Caller holds _summary_write_lock: the tmp path is shared by every writer.
+        if orjson is not None:
+            data = orjson.dumps(summary, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(summary, ensure_ascii=False, indent=2).encode('utf-8')
+        tmp = self.summary_path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, self.summary_path)
+
     def write_summary(self) -> None:
         try:
             total_duration = None
             if self._global_start is not None and self._global_end is not None:
                 total_duration = self._global_end - self._global_start
-            summary = {
-                'totalDurationSec': round(float(total_duration or 0.0), 3),
-                'totalSitesProcessed': int(self.total_sites_processed),
-                'totalArticles': int(self.total_articles),
-                'articlesBySource': {
-                    'sitemap': int(self.articles_by_source.get('sitemap', 0)),
-                    'css': int(self.articles_by_source.get('css', 0))
-                },
-                'sitesByApproach': {
-                    'sitemapOnly': int(self.sites_by_approach.get('sitemapOnly', 0)),
-                    'cssOnly': int(self.sites_by_approach.get('cssOnly', 0)),
-                    'both': int(self.sites_by_approach.get('both', 0)),
-                    'none': int(self.sites_by_approach.get('none', 0))
-                }
-            }
-            with open(self.summary_path, 'w', encoding='utf-8') as f:
-                json.dump(summary, f, ensure_ascii=False, indent=2)
+            with self._lock:
+                state = self._snapshot_state()
+                summary = self._summary(total_duration or 0.0)
+            with self._summary_write_lock:
+                self._write_summary_file(summary)
+                self._last_snapshot_state = state
         except Exception:
             pass
 
     def write_summary_snapshot(self) -> None:
         try:
             with self._lock:
+                state = self._snapshot_state()
+                if state == self._last_snapshot_state:
+                    return
                 now_perf = time.perf_counter()
                 total_duration = (now_perf - self._global_start) if self._global_start is not None else 0.0
-                summary = {
-                    'totalDurationSec': round(float(total_duration or 0.0), 3),
-                    'totalSitesProcessed': int(self.total_sites_processed),
-                    'totalArticles': int(self.total_articles),
-                    'articlesBySource': {
-                        'sitemap': int(self.articles_by_source.get('sitemap', 0)),
-                        'css': int(self.articles_by_source.get('css', 0))
-                    },
-                    'sitesByApproach': {
-                        'sitemapOnly': int(self.sites_by_approach.get('sitemapOnly', 0)),
-                        'cssOnly': int(self.sites_by_approach.get('cssOnly', 0)),
-                        'both': int(self.sites_by_approach.get('both', 0)),
-                        'none': int(self.sites_by_approach.get('none', 0))
-                    }
-                }
-            with open(self.summary_path, 'w', encoding='utf-8') as f:
-                json.dump(summary, f, ensure_ascii=False, indent=2)
+                summary = self._summary(total_duration)
+            with self._summary_write_lock:
+                last = self._last_snapshot_state
+                # Sites processed only grows: a worker that lost the race must not
+                # publish its older counts over a newer snapshot
+                if last is not None and state[0] <= last[0]:
+                    return
+                self._write_summary_file(summary)
+                self._last_snapshot_state = state
         except Exception:
             pass
 
@@ -823,65 +999,76 @@ def _cli():
     print(f"[stream] Output JSONL: {args.output}")
     print(f"[stream] Mode={args.mode}")
     # Optional XLSX site filter
-    allowed_urls: Optional[set] = None
-    allowed_domains: Optional[set] = None
+    allowed_urls: Optional[frozenset] = None
+    allowed_domains: Optional[frozenset] = None
     if args.sites_xlsx:
         try:
             from openpyxl import load_workbook  # type: ignore
             wb = load_workbook(filename=args.sites_xlsx, read_only=True, data_only=True)
-            ws = None
-            if args.sites_sheet is None:
-                ws = wb.worksheets[0]
-            else:
-                # Try by name first, else index
-                if args.sites_sheet in wb.sheetnames:
-                    ws = wb[args.sites_sheet]
+            try:
+                ws = None
+                if args.sites_sheet is None:
+                    ws = wb.worksheets[0]
                 else:
+                    # Try by name first, else index
+                    if args.sites_sheet in wb.sheetnames:
+                        ws = wb[args.sites_sheet]
+                    else:
+                        try:
+                            idx = int(args.sites_sheet)
+                            ws = wb.worksheets[idx]
+                        except Exception:
+                            ws = wb.worksheets[0]
+                # Read header
+                rows_iter = ws.iter_rows(values_only=True)
+                header = next(rows_iter, None)
+                col_idx = 0
+                if isinstance(header, (list, tuple)):
+                    header_lower = [str(h).strip().lower() if h is not None else '' for h in header]
+                    if args.sites_column:
+                        try:
+                            col_idx = header_lower.index(str(args.sites_column).strip().lower())
+                        except Exception:
+                            col_idx = 0
+                    else:
+                        for cand in ('url', 'site', 'domain'):
+                            if cand in header_lower:
+                                col_idx = header_lower.index(cand)
+                                break
+                # Collect
+                allowed_urls_list: List[str] = []
+                allowed_domains_list: List[str] = []
+                for row in rows_iter:
                     try:
-                        idx = int(args.sites_sheet)
-                        ws = wb.worksheets[idx]
-                    except Exception:
-                        ws = wb.worksheets[0]
-            # Read header
-            rows_iter = ws.iter_rows(values_only=True)
-            header = next(rows_iter, None)
-            col_idx = 0
-            if isinstance(header, (list, tuple)):
-                header_lower = [str(h).strip().lower() if h is not None else '' for h in header]
-                if args.sites_column:
-                    try:
-                        col_idx = header_lower.index(str(args.sites_column).strip().lower())
+                        val = row[col_idx]
                     except Exception:
-                        col_idx = 0
-                else:
-                    for cand in ('url', 'site', 'domain'):
-                        if cand in header_lower:
-                            col_idx = header_lower.index(cand)
-                            break
-            # Collect
-            allowed_urls = set()
-            allowed_domains = set()
-            for row in rows_iter:
-                try:
-                    val = row[col_idx]
-                except Exception:
-                    val = None
-                if not val:
-                    continue
-                s = str(val).strip()
-                if not s:
-                    continue
-                # If looks like URL with scheme, keep as URL; always also add domain
+                        val = None
+                    if not val:
+                        continue
+                    s = str(val).strip()
+                    if not s:
+                        continue
+                    # If looks like URL with scheme, keep as URL; always also add domain.
+                    # Only strings containing '://' can have both scheme and netloc.
+                    if '://' in s:
+                        try:
+                            parsed = urlparse(s)
+                            if parsed.scheme and parsed.netloc:
+                                allowed_urls_list.append(s)
+                                allowed_domains_list.append(parsed.netloc.lower())
+                                continue
+                        except Exception:
+                            pass
+                    # treat as domain/host
+                    allowed_domains_list.append(s.lower())
+            finally:
+                # Release the read-only workbook's zip handle even if a row blows up
                 try:
-                    parsed = urlparse(s)
-                    if parsed.scheme and parsed.netloc:
-                        allowed_urls.add(s)
-                        allowed_domains.add(parsed.netloc.lower())
-                    else:
-                        # treat as domain/host
-                        allowed_domains.add(s.lower())
+                    wb.close()
                 except Exception:
-                    allowed_domains.add(s.lower())
+                    pass
+            allowed_urls = frozenset(allowed_urls_list)
+            allowed_domains = frozenset(allowed_domains_list)
             print(f"[stream] Site filter active: urls={len(allowed_urls or [])} domains={len(allowed_domains or [])}")
         except Exception as e:
             print(f"[stream] Failed to load sites XLSX: {e}")
@@ -890,17 +1077,12 @@ def _cli():
     def _is_allowed(site_url: str) -> bool:
         if not args.sites_xlsx:
             return True
-        if not site_url:
+        if not site_url or not (allowed_urls or allowed_domains):
             return False
-        try:
-            d = urlparse(site_url).netloc.lower()
-        except Exception:
-            d = ''
         if allowed_urls and site_url in allowed_urls:
             return True
-        if allowed_domains and d in allowed_domains:
-            return True
-        return False
+        # Memoized parse: paid once per unique URL across both readers
+        return bool(allowed_domains and _domain_of(site_url) in allowed_domains)
 
     # Estimate site count (existing lines only, respecting filter if present)
     est_site_count = 0
@@ -949,18 +1131,29 @@ def _cli():
     print(f"[stream] Concurrency: sites={args.site_concurrency} target={args.target_concurrency} sitemap={args.sitemap_concurrency} css={args.css_concurrency} http={args.http_concurrency} perDomain={args.per_domain_cap}")
 
     processed_sites = set()
-    enqueued_sites = set()
+    # site -> claim token; dict.setdefault is a single atomic operation, so the
+    # check-and-insert below needs no lock
+    enqueued_sites: Dict[str, object] = {}
+
+    def _claim_site(site: str) -> bool:
+        token = object()
+        return enqueued_sites.setdefault(site, token) is token
 
     # Global semaphores
     http_sem = threading.Semaphore(max(1, int(args.http_concurrency)))
     css_sem = threading.Semaphore(max(1, int(args.css_concurrency)))
     sitemap_sem = threading.Semaphore(max(1, int(args.sitemap_concurrency)))
-    domain_sems: Dict[str, threading.Semaphore] = {}
+    # Fixed stripes instead of a per-domain registry: a domain always maps to the same
+    # stripe; unrelated domains may share one, which is fine for a politeness cap
+    domain_stripes = [threading.BoundedSemaphore(max(1, int(args.per_domain_cap))) for _ in range(_DOMAIN_STRIPES)]
 
-    def _get_domain_sem(domain: str) -> threading.Semaphore:
-        if domain not in domain_sems:
-            domain_sems[domain] = threading.Semaphore(max(1, int(args.per_domain_cap)))
-        return domain_sems[domain]
+    def _get_domain_sem(domain: str) -> threading.BoundedSemaphore:
+        return domain_stripes[hash(domain) & (_DOMAIN_STRIPES - 1)]
+
+    # Headful browsing only makes sense with a single CSS worker
+    effective_headful = args.headful and (args.css_concurrency == 1)
+    # Per-leaf sitemap cap, pushed down into the scraper so it stops early
+    sitemap_cap = max(0, int(getattr(args, 'sitemap_max_urls', 0) or 0))
 
     # Stats collector
     collector = StatsCollector(args.log_sites, args.log_summary, append=bool(args.log_append))
@@ -972,59 +1165,71 @@ def _cli():
     # Write initial empty snapshot so file is never empty
     collector.write_summary_snapshot()
 
+    # Overview DB: initialize once, then one thread applies per-site updates in batches
+    try:
+        ov_init_db()
+    except Exception:
+        pass
+    pending_upserts: Queue = Queue()
+    upsert_thr = threading.Thread(target=_drain_overview_upserts, args=(pending_upserts,), daemon=True)
+    upsert_thr.start()
+
     # Site queue and reader
     site_q: Queue = Queue(maxsize=max(10, int(args.queue_size)))
-    stop_reader = threading.Event()
 
     def reader_once():
         for row in _read_jsonl_once(args.stream):
             site = ((row.get('result') or {}).get('url') or '').strip()
             if not site or site in processed_sites or site in enqueued_sites:
                 continue
-            if _is_allowed(site):
+            if _is_allowed(site) and _claim_site(site):
                 site_q.put(row)
-                enqueued_sites.add(site)
-        stop_reader.set()
 
     def reader_tail():
         for row in _iter_jsonl(args.stream):
             site = ((row.get('result') or {}).get('url') or '').strip()
             if not site or site in processed_sites or site in enqueued_sites:
                 continue
-            if _is_allowed(site):
+            if _is_allowed(site) and _claim_site(site):
                 site_q.put(row)
-                enqueued_sites.add(site)
 
     def reader_once_targets():
-        # Read once from targets JSON (if provided)
-        try:
-            with open(args.targets_json, 'r', encoding='utf-8') as f:
-                arr = json.load(f)
-        except Exception:
-            arr = []
-        # Group by source
+        # Stream targets JSON (if provided): elements are grouped as they are parsed, so
+        # the raw array is never materialized alongside the grouped rows
         by_source: Dict[str, Dict[str, Any]] = {}
-        for obj in arr if isinstance(arr, list) else []:
-            try:
-                src = (obj or {}).get('source') or ''
-                st = (obj or {}).get('sourceType') or ''
-                if not src or st not in ('sitemap', 'css'):
+        # Local aliases for the per-element dict walk
+        _get = dict.get
+        by_source_get = by_source.get
+        try:
+            for obj in _iter_targets_json(args.targets_json):
+                try:
+                    src = _get(obj, 'source') or ''
+                    st = _get(obj, 'sourceType') or ''
+                    if not src or st not in ('sitemap', 'css'):
+                        continue
+                    cur = by_source_get(src)
+                    if cur is None:
+                        cur = by_source[src] = {'result': {'url': src, 'llmDetection': {'selectors': []}, 'cssFallback': {}}}
+                    res = cur['result']
+                    if st == 'sitemap':
+                        append = res['llmDetection']['selectors'].append
+                        for leaf in (_get(obj, 'leafSitemaps') or []):
+                            if not leaf:
+                                continue
+                            lu = _get(leaf, 'url')
+                            sel = _get(leaf, 'selectors') or {}
+                            if lu and (_get(sel, 'fields') or {}):
+                                append({'url': lu, 'detectedSelectors': sel})
+                    else:
+                        sections = _get(obj, 'sections') or []
+                        page_url = _get(obj, 'pageUrl') or src
+                        if sections:
+                            res['cssFallback'] = {'triggered': True, 'success': True, 'selectors': {'pageUrl': page_url, 'sections': sections}}
+                except Exception:
                     continue
-                cur = by_source.get(src) or {'result': {'url': src, 'llmDetection': {'selectors': []}, 'cssFallback': {}}}
-                if st == 'sitemap':
-                    for leaf in (obj.get('leafSitemaps') or []):
-                        lu = (leaf or {}).get('url')
-                        sel = (leaf or {}).get('selectors') or {}
-                        if lu and (sel.get('fields') or {}):
-                            cur['result'].setdefault('llmDetection', {}).setdefault('selectors', []).append({'url': lu, 'detectedSelectors': sel})
-                else:
-                    sections = obj.get('sections') or []
-                    page_url = obj.get('pageUrl') or src
-                    if sections:
-                        cur['result']['cssFallback'] = {'triggered': True, 'success': True, 'selectors': {'pageUrl': page_url, 'sections': sections}}
-                by_source[src] = cur
-            except Exception:
-                continue
+        except Exception:
+            pass
+        # A source can reappear later in the file, so groups are only complete at EOF
         for _, row in by_source.items():
             try:
                 site = ((row.get('result') or {}).get('url') or '').strip()
@@ -1032,11 +1237,21 @@ def _cli():
                 site = ''
             if not site or site in processed_sites or site in enqueued_sites:
                 continue
-            site_q.put(row)
-            enqueued_sites.add(site)
-        stop_reader.set()
+            if _claim_site(site):
+                site_q.put(row)
+
+    # One target pool for the whole run (sized for every site worker's fan-out);
+    # warm threads are reused across sites instead of a fresh pool per site
+    target_pool = cf.ThreadPoolExecutor(max_workers=max(1, int(args.site_concurrency)) * max(1, int(args.target_concurrency)), thread_name_prefix='target')
 
-    reader_thr = threading.Thread(target=(reader_once_targets if args.targets_json else (reader_once if args.once else reader_tail)), daemon=True)
+    def reader_main():
+        # Always hand the workers the sentinel, even if the reader fails part way
+        try:
+            (reader_once_targets if args.targets_json else (reader_once if args.once else reader_tail))()
+        finally:
+            site_q.put(_SENTINEL)
+
+    reader_thr = threading.Thread(target=reader_main, daemon=True)
     reader_thr.start()
 
     def process_site(row: Dict[str, Any]) -> Tuple[str, int]:
@@ -1044,66 +1259,38 @@ def _cli():
         targets = _normalize_targets(row)
         if not targets:
             print(f"[site] No targets for: {site}")
-            # Record an empty site with timing
-            started_iso = datetime.now(timezone.utc).isoformat()
+            # Record an empty site with timing (start and end fall in the same second)
+            now_iso = _utc_iso()
             start_perf = time.perf_counter()
             end_perf = time.perf_counter()
-            ended_iso = datetime.now(timezone.utc).isoformat()
-            collector.record_site(site=site, started_at_iso=started_iso, ended_at_iso=ended_iso, duration_sec=(end_perf - start_perf), items_by_source={"sitemap": 0, "css": 0}, approaches_used=[])
+            collector.record_site(site=site, started_at_iso=now_iso, ended_at_iso=now_iso, duration_sec=(end_perf - start_perf), items_by_source={"sitemap": 0, "css": 0}, approaches_used=[])
             return site, 0
 
-        # Prioritize sitemap if mode=auto; include CSS if mode=both or css-only
-        def _submit_targets(ex: cf.ThreadPoolExecutor) -> Tuple[List[cf.Future], Dict[cf.Future, str]]:
-            futures: List[cf.Future] = []
-            fut_type: Dict[cf.Future, str] = {}
-            for t in targets:
-                t_type = t.get('type')
-                use_mode = args.mode
-                if use_mode == 'auto':
-                    # Only run target's natural type; both will run if both exist
-                    use_mode = t_type
-                if use_mode not in ('sitemap', 'css', 'both'):
-                    use_mode = t_type
-
-                if use_mode in ('sitemap', 'both') and t_type == 'sitemap':
-                    domain = _domain_of(t.get('sitemapUrl') or '')
-                    dom_sem = _get_domain_sem(domain)
-                    def _run_sm(tt=t, dsem=dom_sem):
-                        # Acquire order: sitemap -> http -> domain
-                        with sitemap_sem:
-                            with http_sem:
-                                with dsem:
-                                    return _scrape_sitemap_target(tt)
-                    f = ex.submit(_run_sm)
-                    futures.append(f)
-                    fut_type[f] = 'sitemap'
-
-                if use_mode in ('css', 'both') and t_type == 'css':
-                    domain = _domain_of(t.get('pageUrl') or '')
-                    dom_sem = _get_domain_sem(domain)
-                    effective_headful = args.headful and (args.css_concurrency == 1)
-                    def _run_css(tt=t, dsem=dom_sem):
-                        with css_sem:
-                            with http_sem:
-                                with dsem:
-                                    return _scrape_css_target(tt, headful=effective_headful, slowmo_ms=args.slowmo, max_items=args.max_items)
-                    f = ex.submit(_run_css)
-                    futures.append(f)
-                    fut_type[f] = 'css'
-            return futures, fut_type
-
         total_items = 0
-        started_iso = datetime.now(timezone.utc).isoformat()
+        started_iso = _utc_iso()
         start_perf = time.perf_counter()
         items_by_source: Dict[str, int] = {"sitemap": 0, "css": 0}
         approaches_used: List[str] = []
         had_sitemap = any((t.get('type') == 'sitemap') for t in targets)
         had_css = any((t.get('type') == 'css') for t in targets)
         exception_types: set = set()
-        with cf.ThreadPoolExecutor(max_workers=max(1, int(args.target_concurrency))) as ex:
-            futures, fut_type = _submit_targets(ex)
-            approaches_used = sorted(list(set(fut_type.values())))
-            for fut in cf.as_completed(futures):
+        # At most target_concurrency of this site's targets in flight; the next job is
+        # submitted only when one finishes (bounds concurrent browser launches per site)
+        max_inflight = max(1, int(args.target_concurrency))
+        jobs = _target_jobs(targets, args.mode, sitemap_sem, http_sem, css_sem, _get_domain_sem, sitemap_cap, effective_headful, args.slowmo, args.max_items)
+        inflight: set = set()
+        fut_type: Dict[cf.Future, str] = {}
+        while True:
+            for src, fn, fn_args in itertools.islice(jobs, max_inflight - len(inflight)):
+                f = target_pool.submit(fn, *fn_args)
+                inflight.add(f)
+                fut_type[f] = src
+                if src not in approaches_used:
+                    approaches_used.append(src)
+            if not inflight:
+                break
+            done, inflight = cf.wait(inflight, return_when=cf.FIRST_COMPLETED)
+            for fut in done:
                 try:
                     items = fut.result() or []
                 except Exception as e:
@@ -1112,99 +1299,96 @@ def _cli():
                     except Exception:
                         pass
                     items = []
-                # Apply per-leaf sitemap cap if applicable
-                src = fut_type.get(fut, 'unknown')
-                if src == 'sitemap':
-                    cap = int(getattr(args, 'sitemap_max_urls', 0) or 0)
-                    if cap > 0 and len(items) > cap:
-                        items = items[:cap]
+                # Per-leaf sitemap cap is applied inside the scraper (sitemap_cap)
+                src = fut_type.pop(fut, 'unknown')
                 total_items += len(items)
                 if src in items_by_source:
                     items_by_source[src] += len(items)
+                # One timestamp per finished target; its items share second resolution
+                ts = time.strftime('%Y-%m-%d %H:%M:%S') if items else ''
                 for it in items:
                     # Trust the executor type we scheduled (fut_type) instead of inferring from fields
                     writer.submit({
                         'site': site,
                         'sourceType': src,
                         'item': it,
-                        'ts': time.strftime('%Y-%m-%d %H:%M:%S')
+                        'ts': ts
                     })
+        approaches_used.sort()
+        sm_n = items_by_source['sitemap']
+        css_n = items_by_source['css']
         end_perf = time.perf_counter()
-        ended_iso = datetime.now(timezone.utc).isoformat()
+        ended_iso = _utc_iso()
         collector.record_site(site=site, started_at_iso=started_iso, ended_at_iso=ended_iso, duration_sec=(end_perf - start_perf), items_by_source=items_by_source, approaches_used=approaches_used)
         # Periodic summary write
         collector.maybe_write_summary_snapshot(int(args.summary_interval_sites))
-        print(f"[site] Completed: {site} -> items={total_items} (sitemap={items_by_source['sitemap']}, css={items_by_source['css']}), time={round(end_perf - start_perf, 3)}s")
+        print(f"[site] Completed: {site} -> items={total_items} (sitemap={sm_n}, css={css_n}), time={round(end_perf - start_perf, 3)}s")
 
         # === CSV upsert for extraction stage ===
         try:
-            domain = _domain_of(site)
             source_id = site
             path_used = 'Neither'
-            if items_by_source.get('sitemap', 0) > 0 and items_by_source.get('css', 0) > 0:
+            if sm_n > 0 and css_n > 0:
                 path_used = 'Both'
-            elif items_by_source.get('sitemap', 0) > 0:
+            elif sm_n > 0:
                 path_used = 'Sitemap'
-            elif items_by_source.get('css', 0) > 0:
+            elif css_n > 0:
                 path_used = 'CSS'
 
-            # Build extraction error details + zero reason
-            reasons: List[str] = []
-            if not targets:
-                reasons.append('selection_not_run_or_no_targets')
-            else:
-                if had_sitemap and int(items_by_source.get('sitemap', 0)) == 0:
-                    reasons.append('sitemap_zero')
-                if had_css and int(items_by_source.get('css', 0)) == 0:
-                    reasons.append('css_zero')
-            if exception_types:
-                reasons.append('target_exceptions: ' + ','.join(sorted(exception_types))[:60])
-            ctx_bits = [
-                f"targets={len(targets)}",
-                f"sitemapItems={int(items_by_source.get('sitemap', 0))}",
-                f"cssItems={int(items_by_source.get('css', 0))}"
-            ]
+            # Successful sites (items from every attempted source, no errors) have no
+            # reasons to report -> skip assembling them
             extraction_seg = ''
-            if reasons:
-                extraction_seg = 'extraction: ' + ', '.join(reasons) + '; ' + '; '.join(ctx_bits)
-
             zero_reason = ''
-            if int(total_items) == 0:
+            human_extraction = ''
+            if total_items == 0 or exception_types or (had_sitemap and sm_n == 0) or (had_css and css_n == 0):
+                # Build extraction error details + zero reason
+                reasons: List[str] = []
                 if not targets:
-                    zero_reason = 'selection_not_run_or_no_targets'
+                    reasons.append('selection_not_run_or_no_targets')
                 else:
-                    zparts: List[str] = []
-                    if had_sitemap:
-                        zparts.append('sitemap_zero')
-                    if had_css:
-                        zparts.append('css_zero')
-                    if exception_types:
-                        zparts.append('target_exceptions')
-                    zero_reason = ', '.join(zparts) if zparts else 'unknown'
-
-            # Human-friendly explanation for extraction
-            human_extraction = ''
-            if not targets:
-                human_extraction = 'Extraction: selection produced no targets to scrape.'
-            else:
-                msgs: List[str] = []
-                if had_sitemap and int(items_by_source.get('sitemap', 0)) == 0:
-                    msgs.append('sitemap extraction returned 0 items')
-                if had_css and int(items_by_source.get('css', 0)) == 0:
-                    msgs.append('CSS extraction returned 0 items')
+                    if had_sitemap and sm_n == 0:
+                        reasons.append('sitemap_zero')
+                    if had_css and css_n == 0:
+                        reasons.append('css_zero')
                 if exception_types:
-                    msgs.append(f"errors occurred ({', '.join(sorted(exception_types))})")
-                if msgs:
-                    human_extraction = 'Extraction: ' + '; '.join(msgs) + '.'
-
-            # Initialize DB (idempotent)
-            try:
-                ov_init_db()
-            except Exception:
-                pass
+                    reasons.append('target_exceptions: ' + ','.join(sorted(exception_types))[:60])
+                ctx_bits = [
+                    f"targets={len(targets)}",
+                    f"sitemapItems={sm_n}",
+                    f"cssItems={css_n}"
+                ]
+                if reasons:
+                    extraction_seg = 'extraction: ' + ', '.join(reasons) + '; ' + '; '.join(ctx_bits)
+
+                if int(total_items) == 0:
+                    if not targets:
+                        zero_reason = 'selection_not_run_or_no_targets'
+                    else:
+                        zparts: List[str] = []
+                        if had_sitemap:
+                            zparts.append('sitemap_zero')
+                        if had_css:
+                            zparts.append('css_zero')
+                        if exception_types:
+                            zparts.append('target_exceptions')
+                        zero_reason = ', '.join(zparts) if zparts else 'unknown'
+
+                # Human-friendly explanation for extraction
+                if not targets:
+                    human_extraction = 'Extraction: selection produced no targets to scrape.'
+                else:
+                    msgs: List[str] = []
+                    if had_sitemap and sm_n == 0:
+                        msgs.append('sitemap extraction returned 0 items')
+                    if had_css and css_n == 0:
+                        msgs.append('CSS extraction returned 0 items')
+                    if exception_types:
+                        msgs.append(f"errors occurred ({', '.join(sorted(exception_types))})")
+                    if msgs:
+                        human_extraction = 'Extraction: ' + '; '.join(msgs) + '.'
 
-            try:
-                ov_upsert(source_id, {
+            # Applied in batches by the overview upsert thread
+            pending_upserts.put((source_id, {
                 'Domain (sources)': source_id,
                 'Which Path Used for Final Extraction': path_used,
                 'Total Time (sec) in scraping': str(round(end_perf - start_perf, 3)),
@@ -1214,41 +1398,49 @@ def _cli():
                 'Overall pipelines Explanation': human_extraction,
                 # If selection never ran for this domain, hint a reason
                 'Selector Discovery Not Attempted Reason': '' if path_used != 'Neither' else ('selection not run / no targets'),
-                })
-            except Exception:
-                pass
+            }))
         except Exception:
             pass
         return site, total_items
 
     # Site workers
     completed = 0
+
+    def _site_done(done: set) -> None:
+        nonlocal completed
+        for fut in done:
+            try:
+                site, _ = fut.result()
+            except Exception:
+                site = None
+            if site:
+                processed_sites.add(site)
+            completed += 1
+
     try:
-        with cf.ThreadPoolExecutor(max_workers=max(1, int(args.site_concurrency))) as site_pool:
-            futures: List[cf.Future] = []
+        max_sites = max(1, int(args.site_concurrency))
+        with cf.ThreadPoolExecutor(max_workers=max_sites) as site_pool:
+            # Only the sites currently running are held; finished ones are handled
+            # as soon as a slot is needed, so memory stays O(site_concurrency)
+            inflight: set = set()
             while True:
-                try:
-                    row = site_q.get(timeout=0.5)
-                except Empty:
-                    if args.once and stop_reader.is_set() and site_q.empty():
-                        break
-                    continue
-                futures.append(site_pool.submit(process_site, row))
+                # Blocks until the reader hands over a row; no periodic wakeups
+                row = site_q.get()
+                if row is _SENTINEL:
+                    break
+                if len(inflight) >= max_sites:
+                    done, inflight = cf.wait(inflight, return_when=cf.FIRST_COMPLETED)
+                    _site_done(done)
+                inflight.add(site_pool.submit(process_site, row))
                 site_q.task_done()
 
             # Drain outstanding futures
-            for fut in cf.as_completed(futures):
-                try:
-                    site, _ = fut.result()
-                except Exception:
-                    site = None
-                if site:
-                    processed_sites.add(site)
-                completed += 1
+            _site_done(cf.wait(inflight).done)
 
     except KeyboardInterrupt:
         print("[stream] Stopped")
     finally:
+        target_pool.shutdown(wait=True)
         writer.close()
         try:
             collector.end_global()
@@ -1257,6 +1449,10 @@ def _cli():
         except Exception:
             pass
 
+        # Flush queued overview updates so the export sees every site
+        pending_upserts.put(_SENTINEL)
+        upsert_thr.join()
+
         # Final CSV Export from SQLite
         try:
             ov_export_csv()